@@ -19,64 +19,120 @@ IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 import os
-import json
 import shutil
 import argparse
-from eval_utils.file_utils import save_jsonl
-
-# Parse command line arguments
-parser = argparse.ArgumentParser(
-    description="Python script to condense JSON/JSONL files into two single JSONL files; one for Subject-Tasks and one for Transitions"
-)
-parser.add_argument(
-    "-i",
-    "--input",
-    help="Path to directory with JSONL/JSON files",
-    required=True,
-)
-parser.add_argument(
-    "-o",
-    "--output",
-    help="Output path for JSONL files",
-    required=True,
-)
-args = parser.parse_args()
-
-# lists to collect all JSON objects across subject-task and transition JSON/JSONL files
-subject_task_jsons = []
-state_transition_jsons = []
-
-# loop through all files in input directory and combine into a single subject-task JSONL and state-transition JSONL
-for input_file in os.listdir(args.input):
-    # absolute file path
-    input_file_path = os.path.join(args.input, input_file)
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from eval_utils.file_utils import JsonlWriter, json_dumps, json_loads
+
+# number of input files parsed per worker task, since raw data directories often hold many small files
+INPUT_FILES_PER_TASK = 16
+
+# number of worker tasks kept in flight, bounding how many parsed files wait in memory to be written
+MAX_PENDING_TASKS = 2 * (os.cpu_count() or 1)
+
+
+def parse_input_file(input_file_path: str) -> tuple:
+    """
+    Read a raw subject-task .json file or state-transition .jsonl file and serialize its objects as JSONL lines
+        Inputs: input_file_path (str)
+        Outputs: tuple of file kind ("subject_task" or "state_transition") and the objects as JSONL bytes
+    """
+
+    # Objects are returned ready to write, since sending parsed dicts back to the main process costs more
+    # to unpickle than parsing the file there would
 
     # if .json file, read content as a dictionary
     if input_file_path.endswith(".json"):
         # load json object as dictionary
-        with open(input_file_path, "r") as json_file:
-            json_obj = json.load(json_file)
-
-        subject_task_jsons.append(json_obj)
-
-    # if .jsonl file, read each line as a dictionary and store in list
-    elif input_file_path.endswith(".jsonl"):
-        with open(input_file_path) as jsonl_file:
-            # loop through each line of JSONL, store each object as a dict
-            jsonl_line = jsonl_file.readline()
-            while jsonl_line:
-                json_obj = json.loads(jsonl_line)
-                state_transition_jsons.append(json_obj)
-                jsonl_line = jsonl_file.readline()
-
-# write the results to JSONL files
-save_jsonl(subject_task_jsons, os.path.join(args.output, "subject_task.jsonl"))
-save_jsonl(state_transition_jsons, os.path.join(args.output, "state_transitions.jsonl"))
-
-# copy the task_metadata.csv file to the output directory
-task_metadata_filepath = os.path.join(args.input, "task_metadata.csv")
-if os.path.exists(task_metadata_filepath):
-    shutil.copyfile(task_metadata_filepath, os.path.join(args.output, "task_metadata.csv"))
-else:
-    print(f"NOTE: task_metadata.csv is required to process evaluation results.")
-    print(f"Please re-run and add to {args.input}, or manually place in {args.output}")
+        with open(input_file_path, "rb") as json_file:
+            return "subject_task", json_dumps(json_loads(json_file.read())) + b"\n"
+
+    # if .jsonl file, read each line as a dictionary and serialize it back as a line
+    with open(input_file_path, "rb") as jsonl_file:
+        return "state_transition", b"".join(json_dumps(json_loads(jsonl_line)) + b"\n" for jsonl_line in jsonl_file)
+
+
+def parse_input_files(input_file_paths: list) -> list:
+    """
+    Parse a chunk of input files in a single worker task
+        Inputs: input_file_paths (list of str)
+        Outputs: list of parse_input_file results, in input order
+    """
+    return [parse_input_file(input_file_path) for input_file_path in input_file_paths]
+
+
+def parse_input_files_in_order(executor: ProcessPoolExecutor, input_file_paths: list):
+    """
+    Parse input files on a process pool, keeping at most MAX_PENDING_TASKS chunks of files in flight
+        Inputs: executor (ProcessPoolExecutor), input_file_paths (list of str)
+        Outputs: generator of parse_input_file results, in input order
+    """
+    pending_tasks = deque()
+    for start in range(0, len(input_file_paths), INPUT_FILES_PER_TASK):
+        pending_tasks.append(executor.submit(parse_input_files, input_file_paths[start : start + INPUT_FILES_PER_TASK]))
+        if len(pending_tasks) >= MAX_PENDING_TASKS:
+            yield from pending_tasks.popleft().result()
+
+    while pending_tasks:
+        yield from pending_tasks.popleft().result()
+
+
+if __name__ == "__main__":
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Python script to condense JSON/JSONL files into two single JSONL files; one for Subject-Tasks and one for Transitions"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        help="Path to directory with JSONL/JSON files",
+        required=True,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output path for JSONL files",
+        required=True,
+    )
+    args = parser.parse_args()
+
+    # collect all JSON/JSONL files in input directory
+    with os.scandir(args.input) as dir_entries:
+        input_file_paths = [entry.path for entry in dir_entries if entry.name.endswith((".json", ".jsonl"))]
+
+    # parse files in parallel and stream the results into a single subject-task JSONL and state-transition JSONL.
+    # Output is written to temporary files that only replace the outputs once every input file has been parsed,
+    # so a bad input file leaves existing outputs untouched
+    output_paths = [
+        os.path.join(args.output, "subject_task.jsonl"),
+        os.path.join(args.output, "state_transitions.jsonl"),
+    ]
+    subject_task_tmp_path, state_transition_tmp_path = tmp_paths = [f"{path}.tmp" for path in output_paths]
+    try:
+        with (
+            JsonlWriter(subject_task_tmp_path) as subject_task_writer,
+            JsonlWriter(state_transition_tmp_path) as state_transition_writer,
+            ProcessPoolExecutor() as executor,
+        ):
+            for kind, jsonl_lines in parse_input_files_in_order(executor, input_file_paths):
+                if kind == "subject_task":
+                    subject_task_writer.write_lines(jsonl_lines)
+                else:
+                    state_transition_writer.write_lines(jsonl_lines)
+    except BaseException:
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+
+    for tmp_path, output_path in zip(tmp_paths, output_paths):
+        os.replace(tmp_path, output_path)
+
+    # copy the task_metadata.csv file to the output directory
+    task_metadata_filepath = os.path.join(args.input, "task_metadata.csv")
+    if os.path.exists(task_metadata_filepath):
+        shutil.copyfile(task_metadata_filepath, os.path.join(args.output, "task_metadata.csv"))
+    else:
+        print(f"NOTE: task_metadata.csv is required to process evaluation results.")
+        print(f"Please re-run and add to {args.input}, or manually place in {args.output}")
@@ -21,12 +21,52 @@ IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import json
 import csv
 import os
-import copy
+from itertools import chain, islice
+from sys import intern
 from eval_utils.validate_utils import *
 
+# orjson is optional; fall back to the standard library json module if it is not installed
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        # match orjson's compact, UTF-8 output so written files do not depend on which library is installed
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
 # the acceptable time difference between calculated vs reported KM time
 TIME_DIFFERENCE_THRESHOLD = 1
 
+# number of entries serialized per write, and the output buffer size, when saving a JSONL
+SAVE_JSONL_BATCH_SIZE = 10000
+SAVE_JSONL_BUFFER_SIZE = 1024 * 1024
+
+# output directories already confirmed to exist by _ensure_parent_dir
+_validated_dirs = set()
+
+
+def _format_identifier(identifier: tuple) -> str:
+    """
+    Format a (subject, condition, task) tuple as a "subject_condition_task" string
+    """
+    return "_".join(map(str, identifier))
+
+
+def _equal_ignoring_file_source(a: dict, b: dict) -> bool:
+    """
+    Compare two loaded JSONL entries, ignoring the "file_source" attribute added by load_directory
+        Inputs: two JSONL entry dicts
+        Outputs: True if all other attributes match, False otherwise
+    """
+    if a.keys() - {"file_source"} != b.keys() - {"file_source"}:
+        return False
+    return all(a[key] == b[key] for key in a if key != "file_source")
+
 
 def load_directory(dir_name: str) -> tuple((dict, dict)):
     """
@@ -39,27 +79,31 @@ def load_directory(dir_name: str) -> tuple((dict, dict)):
 
     jsonl_contents = {}
     csv_metadata = {}
-    dir_contents = os.listdir(dir_name)
 
-    for filename in dir_contents:
-        file_relative_path = os.path.join(dir_name, filename)
-        file_ext = os.path.splitext(filename)[-1]
+    with os.scandir(dir_name) as dir_entries:
+        dir_contents = list(dir_entries)
+
+    for dir_entry in dir_contents:
+        filename = dir_entry.name
+        file_relative_path = dir_entry.path
 
-        if file_ext == ".jsonl":
+        if filename.endswith(".jsonl"):
             file_contents = load_jsonl_file(file_relative_path)
             for entry in file_contents:
                 # New subject/condition/task, add to list
-                if not entry in jsonl_contents:
-                    jsonl_contents[entry] = file_contents[entry]
-                    jsonl_contents[entry]["file_source"] = filename
+                new_entry = file_contents[entry]
+                recorded_entry = jsonl_contents.get(entry)
+                if recorded_entry is None:
+                    jsonl_contents[entry] = new_entry
+                    new_entry["file_source"] = filename
 
                 # This subject/condition/task has been seen before, check that matched values are the same
                 else:
-                    recorded_total_time = jsonl_contents[entry]["task_total_time"]
-                    recorded_km_time = jsonl_contents[entry]["km_pull_total_time"]
-                    recorded_file = jsonl_contents[entry]["file_source"]
-                    new_total_time = file_contents[entry]["task_total_time"]
-                    new_km_time = file_contents[entry]["km_pull_total_time"]
+                    recorded_total_time = recorded_entry["task_total_time"]
+                    recorded_km_time = recorded_entry["km_pull_total_time"]
+                    recorded_file = recorded_entry["file_source"]
+                    new_total_time = new_entry["task_total_time"]
+                    new_km_time = new_entry["km_pull_total_time"]
                     new_file = filename
                     if abs(recorded_total_time - new_total_time) > TIME_DIFFERENCE_THRESHOLD:
                         print(
@@ -70,29 +114,25 @@ def load_directory(dir_name: str) -> tuple((dict, dict)):
                             f"WARNING: Detected conflicting km_pull_total_time for {entry}. Found km_pull_total_time of {recorded_km_time} in {recorded_file} and {new_km_time} in {new_file}."
                         )  # consider reverting this back to a raised ValueError
 
+                    recorded_has_transitions = "state_transitions" in recorded_entry
+                    new_has_transitions = "state_transitions" in new_entry
+
                     # If math matches, record the subject-task version and add state_transitions to it
-                    if "state_transitions" in jsonl_contents[entry] and "state_transitions" not in file_contents[entry]:
-                        new_jsonl = file_contents[entry]
-                        new_jsonl["state_transitions"] = jsonl_contents[entry]["state_transitions"]
-                        jsonl_contents[entry] = new_jsonl
-                        jsonl_contents[entry]["file_source"] = filename
-                    elif "state_transitions" in file_contents[entry] and "state_transitions" not in jsonl_contents[entry]:
-                        jsonl_contents[entry]["state_transitions"] = file_contents[entry]["state_transitions"]
+                    if recorded_has_transitions and not new_has_transitions:
+                        new_entry["state_transitions"] = recorded_entry["state_transitions"]
+                        new_entry["file_source"] = filename
+                        jsonl_contents[entry] = new_entry
+                    elif new_has_transitions and not recorded_has_transitions:
+                        recorded_entry["state_transitions"] = new_entry["state_transitions"]
 
                     # If the entries are the same type, raise error if they do not contain the same data
-                    elif "state_transitions" in file_contents[entry] and "state_transitions" in jsonl_contents[entry]:
-                        comparable_contents = copy.deepcopy(jsonl_contents[entry])
-                        del comparable_contents["file_source"]
-                        if file_contents[entry] != comparable_contents:
+                    elif new_has_transitions and recorded_has_transitions:
+                        if not _equal_ignoring_file_source(new_entry, recorded_entry):
                             raise ValueError(
                                 f"Detected two conflicting State Transitions sequences for {entry} in files {recorded_file} and {new_file}."
                             )
-                    elif (
-                        "state_transitions" not in file_contents[entry] and "state_transitions" not in jsonl_contents[entry]
-                    ):
-                        comparable_contents = copy.deepcopy(jsonl_contents[entry])
-                        del comparable_contents["file_source"]
-                        if file_contents[entry] != comparable_contents:
+                    else:
+                        if not _equal_ignoring_file_source(new_entry, recorded_entry):
                             raise ValueError(
                                 f"Detected two conflicting Subject Task entries for {entry} in files {recorded_file} and {new_file}."
                             )
@@ -117,10 +157,10 @@ def load_jsonl_file(jsonl_filename: str) -> dict:
     jsonl_file_types = ["Subject-Task", "State Transitions"]
 
     # Identify file type. Raise exception if unable to.
-    with open(jsonl_filename) as jsonl_file:
+    with open(jsonl_filename, "rb") as jsonl_file:
         # Load first line of JSONL
         first_line = jsonl_file.readline()
-        first_line_json = json.loads(first_line)
+        first_line_json = json_loads(first_line)
 
         # Try both file types and print errors to user for debugging
         try:
@@ -135,16 +175,75 @@ def load_jsonl_file(jsonl_filename: str) -> dict:
                     f"Could not identify JSONL file type of {jsonl_filename}.\nTried {jsonl_file_types[0]} format: {err1}.\nTried {jsonl_file_types[1]} format: {err2}."
                 )
 
-    # Once file type has been identified, pass file to appropriate reader
-    if file_type == jsonl_file_types[0]:
-        subject_tasks = load_subject_task_file(jsonl_filename)
-        # If no error has been raised, file looks good
-        return subject_tasks
+        # Once file type has been identified, pass the rest of the file to appropriate reader
+        if file_type == jsonl_file_types[0]:
+            subject_tasks = _read_subject_task_lines(jsonl_file, first_line_json, jsonl_filename)
+            # If no error has been raised, file looks good
+            return subject_tasks
+
+        elif file_type == jsonl_file_types[1]:
+            state_transitions = _read_state_transitions_lines(jsonl_file, first_line_json, jsonl_filename)
+            # If no error has been raised, file looks good
+            return state_transitions
+
+
+def _ensure_parent_dir(outfile_path: str) -> None:
+    """
+    Check that the directory of an output file path exists, skipping the check for directories already validated
+    """
+    dir_name = os.path.dirname(outfile_path)
+    if dir_name in _validated_dirs:
+        return
+    if not os.path.isdir(dir_name):
+        raise Exception(f"Directory path {dir_name} does not exist!")
+    _validated_dirs.add(dir_name)
+
+
+class JsonlWriter:
+    """Incrementally write JSON objects to a JSONL file
+
+    Args:
+        outfile_path (str): output file path
+    """
+
+    def __init__(self, outfile_path):
+        _ensure_parent_dir(outfile_path)
+        self.outfile = open(f"{outfile_path}", "wb", buffering=SAVE_JSONL_BUFFER_SIZE)
 
-    elif file_type == jsonl_file_types[1]:
-        state_transitions = load_state_transitions_file(jsonl_filename)
-        # If no error has been raised, file looks good
-        return state_transitions
+    def write(self, json_object):
+        """Write a single JSON object as one line
+
+        Args:
+            json_object (dict): JSONL content object
+        """
+        self.outfile.write(json_dumps(json_object) + b"\n")
+
+    def write_many(self, json_objects):
+        """Write JSON objects as lines, serializing batches of entries into a single write
+
+        Args:
+            json_objects (iterable): dictionaries defining JSONL content objects
+        """
+        entries = iter(json_objects)
+        while batch := list(islice(entries, SAVE_JSONL_BATCH_SIZE)):
+            self.outfile.write(b"\n".join(map(json_dumps, batch)) + b"\n")
+
+    def write_lines(self, jsonl_lines):
+        """Write lines that have already been serialized
+
+        Args:
+            jsonl_lines (bytes): newline-terminated JSONL lines
+        """
+        self.outfile.write(jsonl_lines)
+
+    def close(self):
+        self.outfile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 
 def save_jsonl(json_object_list, outfile_path):
@@ -155,15 +254,8 @@ def save_jsonl(json_object_list, outfile_path):
         outfile_path (str): output file path
     """
 
-    # check that outfile_path directory path exists
-    if not os.path.isdir(os.path.dirname(outfile_path)):
-        raise Exception(f"Directory path {os.path.dirname(outfile_path)} does not exist!")
-
-    # write json list to outfile_path
-    with open(f"{outfile_path}", "w") as outfile:
-        for entry in json_object_list:
-            json.dump(entry, outfile)
-            outfile.write("\n")
+    with JsonlWriter(outfile_path) as writer:
+        writer.write_many(json_object_list)
 
 
 def load_subject_task_file(jsonl_filename: str) -> dict:
@@ -186,24 +278,28 @@ def load_subject_task_file(jsonl_filename: str) -> dict:
                 "User1_Task2": ...
             }
     """
-    subject_tasks = {}
-    with open(jsonl_filename) as jsonl_file:
-        line = jsonl_file.readline()
-        line_no = 1
-        while line:
-            json_in = json.loads(line)
+    with open(jsonl_filename, "rb") as jsonl_file:
+        first_line = jsonl_file.readline()
+        if not first_line:
+            return {}
+        return _read_subject_task_lines(jsonl_file, json_loads(first_line), jsonl_filename)
 
-            # Run validation checks
-            verify_all_subject_task_fields_present(json_in, line_no, jsonl_filename)
-            json_in["task_start_time"] = iso_str_as_datetime(json_in["task_start_time"])
-            type_check_subject_task_fields(json_in, line_no, jsonl_filename)
-            subject_condition_task_identifier = f"{json_in['subject_id']}_{json_in['condition']}_{json_in['task_id']}"
-            subject_tasks[subject_condition_task_identifier] = json_in
 
-            line = jsonl_file.readline()
-            line_no += 1
+def _read_subject_task_lines(jsonl_file, first_json: dict, jsonl_filename: str) -> dict:
+    """
+    Read the remaining lines of an open Subject-Task JSONL whose first line has already been parsed
+        Inputs: jsonl_file (binary file object positioned at line 2), first_json (dict), jsonl_filename (str)
+        Outputs: dictionary of dictionaries, indexed as "subject_condition_task" (see load_subject_task_file)
+    """
+    subject_tasks = {}
+    for line_no, json_in in enumerate(chain([first_json], map(json_loads, jsonl_file)), start=1):
+        # Run validation checks
+        validate_subject_task_fields(json_in, line_no, jsonl_filename)
+        json_in["condition"] = intern(json_in["condition"])
+        subject_condition_task_identifier = f"{json_in['subject_id']}_{json_in['condition']}_{json_in['task_id']}"
+        subject_tasks[subject_condition_task_identifier] = json_in
 
-        return subject_tasks
+    return subject_tasks
 
 
 def load_state_transitions_file(jsonl_filename: str) -> dict:
@@ -238,80 +334,112 @@ def load_state_transitions_file(jsonl_filename: str) -> dict:
             }
     """
 
+    with open(jsonl_filename, "rb") as jsonl_file:
+        first_line = jsonl_file.readline()
+        if not first_line:
+            return {}
+        return _read_state_transitions_lines(jsonl_file, json_loads(first_line), jsonl_filename)
+
+
+def _read_state_transitions_lines(jsonl_file, first_json: dict, jsonl_filename: str) -> dict:
+    """
+    Read the remaining lines of an open State Transitions JSONL whose first line has already been parsed
+        Inputs: jsonl_file (binary file object positioned at line 2), first_json (dict), jsonl_filename (str)
+        Outputs: dictionary of dictionaries, indexed as "subject_condition_task" (see load_state_transitions_file)
+    """
+
     # Keep track of most recently seen state from a subject/condition/task combo
     # Include timestamp, state_id, and line no
     # This allows more than one subject/condition/task combo to be in a JSONL
     subject_task_state = {}
 
-    with open(jsonl_filename) as jsonl_file:
-        # Load JSONL
-        line = jsonl_file.readline()
-        line_no = 1
-        state_transitions = {}
-        while line:
-            json_in = json.loads(line)
-
-            # Run validation checks on each line
-            verify_all_state_transition_fields_present(json_in, line_no, jsonl_filename)
-            json_in["utc_timestamp"] = iso_str_as_datetime(json_in["utc_timestamp"])
-            type_check_state_transition_fields(json_in, line_no, jsonl_filename)
-
-            # Run validation checks between sequential JSONs
-            # Use subject_task_state to retrieve most recently seen JSON for the given subject/task pair
-            subject_task_identifier = f"{json_in['subject_id']}_{json_in['condition']}_{json_in['task_id']}"
-            if subject_task_identifier in subject_task_state:
-                previous_state = subject_task_state[subject_task_identifier]
-                verify_timestamps_inorder(
-                    previous_state["utc_timestamp"],
-                    json_in["utc_timestamp"],
-                    previous_state["line_no"],
-                    line_no,
-                    previous_state["state_id"],
-                    jsonl_filename,
-                )
-                verify_state_transition_valid(
-                    previous_state["state_id"], json_in["state_id"], previous_state["line_no"], line_no, jsonl_filename
-                )
-            else:
-                state_transitions[subject_task_identifier] = {
-                    "subject_id": json_in["subject_id"],
-                    "condition": json_in["condition"],
-                    "task_id": json_in["task_id"],
-                    "task_start_time": json_in["utc_timestamp"],
-                    "task_total_time": 0.0,
-                    "km_pull_total_time": 0.0,
-                    "km_push_total_time": 0.0,
-                    "state_transitions": [],
-                }
-                verify_first_state_is_task_initialized([json_in], subject_task_identifier, line_no, jsonl_filename)
-
-            # If no errors, record output and state
-            if subject_task_identifier in subject_task_state:
-                previous_state = subject_task_state[subject_task_identifier]
-                elapsed_time = (json_in["utc_timestamp"] - previous_state["utc_timestamp"]).total_seconds()
-                state_transitions[subject_task_identifier]["task_total_time"] += elapsed_time
-                if previous_state["state_id"] == "km_pull_activity":
-                    state_transitions[subject_task_identifier]["km_pull_total_time"] += elapsed_time
-                if previous_state["state_id"] == "km_push_activity":
-                    state_transitions[subject_task_identifier]["km_push_total_time"] += elapsed_time
-
-            state_transitions[subject_task_identifier]["state_transitions"].append(json_in)
-            subject_task_state[subject_task_identifier] = {
-                "utc_timestamp": json_in["utc_timestamp"],
-                "state_id": json_in["state_id"],
-                "line_no": line_no,
+    # Load JSONL
+    state_transitions = {}
+    for line_no, json_in in enumerate(chain([first_json], map(json_loads, jsonl_file)), start=1):
+        # Run validation checks on each line
+        validate_state_transition_fields(json_in, line_no, jsonl_filename)
+
+        # Every line is kept in memory, so share a single string object per distinct condition and state_id.
+        # Comparisons against the (already interned) constants in validate_utils then match on identity
+        json_in["condition"] = intern(json_in["condition"])
+        json_in["state_id"] = intern(json_in["state_id"])
+
+        # Run validation checks between sequential JSONs
+        # Use subject_task_state to retrieve most recently seen JSON for the given subject/task pair
+        # Identifiers are kept as (subject, condition, task) tuples and only formatted as strings for output.
+        # IDs may be str or int, so they are grouped by their string form, as the output keys are (1 and "1" match)
+        subject_task_identifier = (str(json_in["subject_id"]), json_in["condition"], str(json_in["task_id"]))
+        previous_state = subject_task_state.get(subject_task_identifier)
+        if previous_state is not None:
+            transitions_entry = state_transitions[subject_task_identifier]
+            verify_timestamps_inorder(
+                previous_state["utc_timestamp"],
+                json_in["utc_timestamp"],
+                previous_state["line_no"],
+                line_no,
+                previous_state["state_id"],
+                jsonl_filename,
+            )
+            verify_state_transition_valid(
+                previous_state["state_id"], json_in["state_id"], previous_state["line_no"], line_no, jsonl_filename
+            )
+        else:
+            transitions_entry = state_transitions[subject_task_identifier] = {
+                "subject_id": json_in["subject_id"],
+                "condition": json_in["condition"],
+                "task_id": json_in["task_id"],
+                "task_start_time": json_in["utc_timestamp"],
+                "task_total_time": 0.0,
+                "km_pull_total_time": 0.0,
+                "km_push_total_time": 0.0,
+                "state_transitions": [],
             }
-            line = jsonl_file.readline()
-            line_no += 1
-
-        # Run validation check on last states
-        for subject_task_identifier in state_transitions:
-            transitions = state_transitions[subject_task_identifier]["state_transitions"]
-            verify_last_state_is_task_conclusion(
-                transitions, subject_task_identifier, subject_task_state[subject_task_identifier]["line_no"], jsonl_filename
+            verify_first_state_is_task_initialized(
+                [json_in], _format_identifier(subject_task_identifier), line_no, jsonl_filename
+            )
+
+        # If no errors, record output and state
+        if previous_state is not None:
+            previous_state_id = previous_state["state_id"]
+            elapsed_time = (json_in["utc_timestamp"] - previous_state["utc_timestamp"]).total_seconds()
+            transitions_entry["task_total_time"] += elapsed_time
+            if previous_state_id == "km_pull_activity":
+                transitions_entry["km_pull_total_time"] += elapsed_time
+            if previous_state_id == "km_push_activity":
+                transitions_entry["km_push_total_time"] += elapsed_time
+
+        transitions_entry["state_transitions"].append(json_in)
+        subject_task_state[subject_task_identifier] = {
+            "utc_timestamp": json_in["utc_timestamp"],
+            "state_id": json_in["state_id"],
+            "line_no": line_no,
+        }
+
+    # Run validation check on last states
+    for subject_task_identifier in state_transitions:
+        transitions = state_transitions[subject_task_identifier]["state_transitions"]
+        verify_last_state_is_task_conclusion(
+            transitions,
+            _format_identifier(subject_task_identifier),
+            subject_task_state[subject_task_identifier]["line_no"],
+            jsonl_filename,
+        )
+
+    # Distinct identifiers can format to the same string (e.g. "a_baseline", "prototype", "t" and "a", "baseline",
+    # "prototype_t"), so refuse to merge them rather than silently dropping one of the sequences
+    formatted_state_transitions = {}
+    formatted_identifiers = {}
+    for subject_task_identifier, transitions_entry in state_transitions.items():
+        formatted_identifier = _format_identifier(subject_task_identifier)
+        other_identifier = formatted_identifiers.setdefault(formatted_identifier, subject_task_identifier)
+        if other_identifier is not subject_task_identifier:
+            raise ValueError(
+                f"subject_id, condition and task_id {other_identifier} and {subject_task_identifier} of {jsonl_filename} "
+                f"both map to {formatted_identifier}"
             )
+        formatted_state_transitions[formatted_identifier] = transitions_entry
 
-        return state_transitions
+    return formatted_state_transitions
 
 
 def load_csv_file(csv_filename: str) -> dict:
@@ -329,19 +457,33 @@ def load_csv_file(csv_filename: str) -> dict:
     """
     tasks = {}
     with open(csv_filename, newline="") as csvfile:
-        task_metadata = csv.reader(csvfile)
-        for i, row in enumerate(task_metadata):
-            if i == 0:
-                verify_column_names(row)
-                column_names = row
-            else:
-                row = verify_row_types(row, i + 1)
-                attributes = {}
-                for j, col in enumerate(row):
-                    if j == 0:
-                        continue
-                    else:
-                        attributes[column_names[j]] = col
-                tasks[row[0]] = attributes
+        task_metadata = csv.DictReader(csvfile)
+        column_names = task_metadata.fieldnames
+        if column_names is None:
+            return tasks
+        verify_column_names(column_names)
+        attribute_names = column_names[1:]
+        for row in task_metadata:
+            # DictReader fills cells missing from a short row with None and collects a long row's extra cells
+            # under the None key, so check the cell count before converting types. Trailing optional cells
+            # may be left off, and are read as empty
+            extra_values = row.pop(None, [])
+            row_values = list(row.values())
+            num_values = len(row_values) - row_values.count(None) + len(extra_values)
+            if extra_values:
+                raise ValueError(
+                    f"CSV metadata file line {task_metadata.line_num}: expected {len(column_names)} values, found {num_values}"
+                )
+            if num_values < len(required_column_names):
+                # Only the optional columns may be left off, so name both accepted counts when the header has any
+                expected_values = len(required_column_names)
+                if len(column_names) > expected_values:
+                    expected_values = f"{expected_values} or {len(column_names)}"
+                raise ValueError(
+                    f"CSV metadata file line {task_metadata.line_num}: expected {expected_values} values, found {num_values}"
+                )
+            row_values = ["" if value is None else value for value in row_values]
+            row = verify_row_types(row_values, task_metadata.line_num)
+            tasks[row[0]] = dict(zip(attribute_names, row[1:]))
 
     return tasks
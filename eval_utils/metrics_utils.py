@@ -18,7 +18,9 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR
 IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-import copy
+from itertools import chain
+from math import fsum
+from statistics import fmean
 
 #######################
 ## GENERAL FUNCTIONS ##
@@ -32,15 +34,53 @@ def filter_jsonl_input(jsonl_input: dict, subject: str = None, condition: str =
         Outputs: list of state transition dicts which pass filter
     """
 
-    # A JSONL imported using a file_utils function will be indexed as "subject_condition_task"
-    if subject:
-        jsonl_input = {key: value for key, value in jsonl_input.items() if key.startswith(f"{subject}_")}
-    if condition:
-        jsonl_input = {key: value for key, value in jsonl_input.items() if f"_{condition}_" in key}
-    if task:
-        jsonl_input = {key: value for key, value in jsonl_input.items() if key.endswith(f"_{task}")}
+    # Nothing to filter on, so avoid copying the input
+    if not (subject or condition or task):
+        return jsonl_input
 
-    return jsonl_input
+    subject = str(subject) if subject else None
+    condition = str(condition) if condition else None
+    task = str(task) if task else None
+
+    # A JSONL imported using a file_utils function will have subject_id, condition, and task_id parsed on each
+    # entry, so match on those in a single pass rather than scanning the "subject_condition_task" key
+    return {
+        key: value
+        for key, value in jsonl_input.items()
+        if (subject is None or str(value["subject_id"]) == subject)
+        and (condition is None or value["condition"] == condition)
+        and (task is None or str(value["task_id"]) == task)
+    }
+
+
+def group_by_task(jsonl_input: dict) -> dict:
+    """
+    Group JSONL objects by task ID in a single pass, so per-task metrics do not rescan the full input
+        Inputs: list of JSONL dicts
+        Outputs: dict of task ID to list of JSONL dicts for that task
+    """
+    jsonl_by_task = {}
+    for key, value in jsonl_input.items():
+        jsonl_by_task.setdefault(str(value["task_id"]), {})[key] = value
+
+    return jsonl_by_task
+
+
+def split_by_condition(jsonl_input: dict, task: str) -> tuple:
+    """
+    Return the prototype and baseline JSONL objects for a task, filtering the input in a single pass
+        Inputs: list of JSONL dicts, task ID
+        Outputs: tuple of (prototype, baseline) lists of JSONL dicts which match the task
+    """
+    task = str(task)
+    jsonl_by_condition = {"prototype": {}, "baseline": {}}
+    for key, value in jsonl_input.items():
+        if str(value["task_id"]) == task:
+            condition_jsonl = jsonl_by_condition.get(value["condition"])
+            if condition_jsonl is not None:
+                condition_jsonl[key] = value
+
+    return jsonl_by_condition["prototype"], jsonl_by_condition["baseline"]
 
 
 ########################
@@ -56,11 +96,7 @@ def get_average_km_fraction(filtered_jsonl: dict) -> float:
         Inputs: list of JSONLs with relevant subject/condition/task to be averaged
         Outputs: float representing average time of list
     """
-    km_time_fractions = []
-    for key, value in filtered_jsonl.items():
-        fraction = value["km_pull_total_time"] / value["task_total_time"]
-        km_time_fractions.append(fraction)
-    return sum(km_time_fractions) / len(km_time_fractions)
+    return fmean(value["km_pull_total_time"] / value["task_total_time"] for value in filtered_jsonl.values())
 
 
 def get_average_total_time(filtered_jsonl: dict) -> float:
@@ -71,10 +107,7 @@ def get_average_total_time(filtered_jsonl: dict) -> float:
         Inputs: list of JSONLs with relevant subject/condition/task to be averaged
         Outputs: float representing average total_time
     """
-    times = []
-    for key, value in filtered_jsonl.items():
-        times.append(value["task_total_time"])
-    return sum(times) / len(times)
+    return fmean(value["task_total_time"] for value in filtered_jsonl.values())
 
 
 def get_km_time_proportional_reduction(jsonl_input: dict, task: str) -> float:
@@ -86,19 +119,18 @@ def get_km_time_proportional_reduction(jsonl_input: dict, task: str) -> float:
         Inputs: list of JSONLs in subject-task or state transition format, task ID
         Outputs: float representing km time proportional reduction
     """
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="prototype", task=task)
-    if len(filtered_jsonl) <= 0:
+    prototype_jsonl, baseline_jsonl = split_by_condition(jsonl_input, task)
+    if len(prototype_jsonl) <= 0:
         raise ValueError(
             f"No prototype data for task {task} in JSONL. Times are required from both prototype and baseline conditions."
         )
-    prototype_average_km_fraction = get_average_km_fraction(filtered_jsonl)
-
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="baseline", task=task)
-    if len(filtered_jsonl) <= 0:
+    if len(baseline_jsonl) <= 0:
         raise ValueError(
             f"No baseline data for task {task} in JSONL. Times are required from both prototype and baseline conditions."
         )
-    baseline_average_km_fraction = get_average_km_fraction(filtered_jsonl)
+
+    prototype_average_km_fraction = get_average_km_fraction(prototype_jsonl)
+    baseline_average_km_fraction = get_average_km_fraction(baseline_jsonl)
 
     # handle edge case when both Baseline and Prototype systems have zero KM time
     if baseline_average_km_fraction == 0 and prototype_average_km_fraction == 0:
@@ -122,19 +154,18 @@ def get_prototype_time_relative_to_baseline_and_optimal(jsonl_input: dict, task:
         Outputs: float representing time relative to baseline and optimal
     """
 
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="prototype", task=task)
-    if len(filtered_jsonl) <= 0:
+    prototype_jsonl, baseline_jsonl = split_by_condition(jsonl_input, task)
+    if len(prototype_jsonl) <= 0:
         raise ValueError(
             f"No prototype data for {task} in JSONL. Times are required from both prototype and baseline conditions."
         )
-    prototype_average_time = get_average_total_time(filtered_jsonl)
-
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="baseline", task=task)
-    if len(filtered_jsonl) <= 0:
+    if len(baseline_jsonl) <= 0:
         raise ValueError(
             f"No baseline data for {task} in JSONL. Times are required from both prototype and baseline conditions."
         )
-    baseline_average_time = get_average_total_time(filtered_jsonl)
+
+    prototype_average_time = get_average_total_time(prototype_jsonl)
+    baseline_average_time = get_average_total_time(baseline_jsonl)
 
     # if Prototype time is less than Baseline, report the Prototype percent time reduction from Baseline (0%) to expert time (100%)
     if prototype_average_time <= baseline_average_time:
@@ -150,17 +181,18 @@ def get_prototype_time_relative_to_baseline_and_optimal(jsonl_input: dict, task:
 #########################
 
 
-def get_average_failure_rate(filtered_jsonl: dict, max_score: int) -> float:
+def get_average_failure_rate(filtered_jsonl: dict, max_score: int, passing_score: float = None) -> float:
     """
-    Given a list of filtered subject-task JSONLs, calculate the average failure rate
-        Inputs: list of JSONLs with relevant subject/condition/task to be averaged, maximum score for task
+    Given a list of filtered subject-task JSONLs, calculate the average failure rate. If a passing score
+    is given, each grade is recast to either 0 (failing) or the maximum score (passing) before averaging.
+        Inputs: list of JSONLs with relevant subject/condition/task to be averaged, maximum score for task,
+                (optional) passing score for task
         Outputs: float representing average failure rate of list
     """
-    success_scores = []
-    for key, value in filtered_jsonl.items():
-        if "task_grade" in value:
-            success_scores.append(value["task_grade"])
-    average_success_score = sum(success_scores) / len(success_scores)
+    grades = (value["task_grade"] for value in filtered_jsonl.values() if "task_grade" in value)
+    if passing_score:
+        grades = (max_score if grade >= passing_score else 0 for grade in grades)
+    average_success_score = fmean(grades)
 
     average_failure_score = max_score - average_success_score
     average_failure_rate = average_failure_score / max_score
@@ -168,33 +200,36 @@ def get_average_failure_rate(filtered_jsonl: dict, max_score: int) -> float:
     return average_failure_rate
 
 
-def get_proportional_task_failure_rate_reduction(jsonl_input: dict, task: str, max_score: int) -> float:
+def get_proportional_task_failure_rate_reduction(
+    jsonl_input: dict, task: str, max_score: int, passing_score: float = None
+) -> float:
     """
     Given a list of JSONLs, a task ID, and a max score calculate the fractional reduction
     in the failure rate for that task between prototype and the baseline. All scores from any subject
     for a given task/condition combination will be averaged before the fractional
-    reduction is calculated.
-        Inputs: list of JSONLs in subject-task format, task ID, maximum score for task
+    reduction is calculated. If a passing score is given, scores are binarized as in
+    get_binarized_proportional_task_failure_rate_reduction.
+        Inputs: list of JSONLs in subject-task format, task ID, maximum score for task,
+                (optional) passing score for task
         Outputs: float representing score proportional reduction
     """
 
-    random_key = next(iter(jsonl_input))
-    if "task_grade" not in jsonl_input[random_key]:
+    # Check every entry for the task, rather than whichever entry of the input happens to come first
+    prototype_jsonl, baseline_jsonl = split_by_condition(jsonl_input, task)
+    if any("task_grade" not in value for value in chain(prototype_jsonl.values(), baseline_jsonl.values())):
         raise TypeError("Input JSONL must be Subject-Task format in order to calculate increased score.")
 
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="prototype", task=task)
-    if len(filtered_jsonl) <= 0:
+    if len(prototype_jsonl) <= 0:
         raise ValueError(
             f"No prototype data for {task} in JSONL. Grades are required from both prototype and baseline conditions."
         )
-    prototype_average_failure_rate = get_average_failure_rate(filtered_jsonl, max_score)
-
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="baseline", task=task)
-    if len(filtered_jsonl) <= 0:
+    if len(baseline_jsonl) <= 0:
         raise ValueError(
             f"No baseline data for {task} in JSONL. Grades are required from both prototype and baseline conditions."
         )
-    baseline_average_failure_rate = get_average_failure_rate(filtered_jsonl, max_score)
+
+    prototype_average_failure_rate = get_average_failure_rate(prototype_jsonl, max_score, passing_score)
+    baseline_average_failure_rate = get_average_failure_rate(baseline_jsonl, max_score, passing_score)
 
     # handle edge cases when both Baseline and Prototype system rates have zero values
     if baseline_average_failure_rate == 0 and prototype_average_failure_rate == 0:
@@ -225,13 +260,9 @@ def get_binarized_proportional_task_failure_rate_reduction(
     if passing_score == "":
         raise ValueError("Passing score must be numeric.")
 
-    jsonl_input_copy = copy.deepcopy(jsonl_input)
-    for key, value in jsonl_input_copy.items():
-        if "task_grade" in value and passing_score:
-            value["task_grade"] = max_score if value["task_grade"] >= passing_score else 0
-
+    # Grades are binarized as they are averaged, so the input does not need to be copied
     binarized_proportional_task_failure_rate_reduction = get_proportional_task_failure_rate_reduction(
-        jsonl_input_copy, task, max_score
+        jsonl_input, task, max_score, passing_score
     )
     return binarized_proportional_task_failure_rate_reduction
 
@@ -251,12 +282,9 @@ def get_productivity(filtered_jsonl: dict) -> float:
     # Note that this function does not normalize scores to 0-100 range
     # In order to compare scores across systems, normalization should be performed first.
 
-    # Iterate through values and collect the scores and times
-    scores_sum = 0
-    times_sum = 0
-    for key, value in filtered_jsonl.items():
-        scores_sum += value["task_grade"]
-        times_sum += value["task_total_time"] / 60
+    # Sum the scores and times (in minutes)
+    scores_sum = fsum(value["task_grade"] for value in filtered_jsonl.values())
+    times_sum = fsum(value["task_total_time"] for value in filtered_jsonl.values()) / 60
 
     # Avoid divide by zero error
     if times_sum == 0:
@@ -274,23 +302,22 @@ def get_proportional_increase_in_productivity(jsonl_input: dict, task: str) -> f
         Outputs: float representing proportional increase in productivity from baseline to prototype
     """
 
-    random_key = next(iter(jsonl_input))
-    if "task_grade" not in jsonl_input[random_key]:
+    # Check every entry for the task, rather than whichever entry of the input happens to come first
+    prototype_jsonl, baseline_jsonl = split_by_condition(jsonl_input, task)
+    if any("task_grade" not in value for value in chain(prototype_jsonl.values(), baseline_jsonl.values())):
         raise TypeError("Input JSONL must be Subject-Task format in order to calculate productivity.")
 
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="prototype", task=task)
-    if len(filtered_jsonl) <= 0:
+    if len(prototype_jsonl) <= 0:
         raise ValueError(
             f"No prototype data for task {task} in JSONL. Times are required from both prototype and baseline conditions."
         )
-    prototype_productivity = get_productivity(filtered_jsonl)
-
-    filtered_jsonl = filter_jsonl_input(jsonl_input, condition="baseline", task=task)
-    if len(filtered_jsonl) <= 0:
+    if len(baseline_jsonl) <= 0:
         raise ValueError(
             f"No baseline data for {task} in JSONL. Grades are required from both prototype and baseline conditions."
         )
-    baseline_productivity = get_productivity(filtered_jsonl)
+
+    prototype_productivity = get_productivity(prototype_jsonl)
+    baseline_productivity = get_productivity(baseline_jsonl)
 
     # Avoid divide by zero error
     if baseline_productivity == 0:
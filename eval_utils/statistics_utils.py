@@ -19,11 +19,15 @@ IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 import numpy as np
-from math import ceil, sqrt
+from functools import lru_cache
+from math import ceil
 import matplotlib.pyplot as plt
 from statsmodels.stats.power import TTestIndPower
 from scipy.stats import mannwhitneyu, ttest_ind
 
+# T-test power calculator from statmodels; it holds no per-call state, so a single instance is shared
+_TTEST_POWER = TTestIndPower()
+
 
 def estimate_t_test_effect_size(prototype_mean, baseline_mean, prototype_std_dev, baseline_std_dev):
     """Function to quantify effect size via Cohen's D Statistic for independent Welch T-test effect size; this calculation assumes 2 degree of freedom
@@ -31,19 +35,22 @@ def estimate_t_test_effect_size(prototype_mean, baseline_mean, prototype_std_dev
     Effect size is a variable that must be assumed when calculating for necessary sample size in a t-test power analysis, it
     represents the effect (or difference) expected to be seen between the Prototype system and baseline
 
+    All arguments may also be array-like, in which case effect sizes are computed element-wise for every
+    task/metric pair in a single vectorized call
+
     Args:
-        prototype_mean (float):  Prototype system mean estimate
-        baseline_mean (float):  Baseline system mean estimate
-        prototype_std_dev (float):  Prototype system standard deviation estimate
-        baseline_std_dev (float):  Baseline system standard deviation estimate
+        prototype_mean (float or array-like):  Prototype system mean estimate
+        baseline_mean (float or array-like):  Baseline system mean estimate
+        prototype_std_dev (float or array-like):  Prototype system standard deviation estimate
+        baseline_std_dev (float or array-like):  Baseline system standard deviation estimate
 
     Returns:
-        float: effect size estimate
+        float or np.ndarray: effect size estimate
     """
 
     # calculate mean difference and pooled standard deviation for Welch's independent t-test
-    mean_difference = prototype_mean - baseline_mean
-    pooled_standard_deviation = sqrt((prototype_std_dev ^ 2 + baseline_std_dev ^ 2) / 2)
+    mean_difference = np.asarray(prototype_mean, dtype=np.float64) - np.asarray(baseline_mean, dtype=np.float64)
+    pooled_standard_deviation = np.sqrt((np.square(prototype_std_dev) + np.square(baseline_std_dev)) / 2.0)
 
     # calculate and return Cohen's D statistic
     cohens_d_stat = mean_difference / pooled_standard_deviation
@@ -51,6 +58,14 @@ def estimate_t_test_effect_size(prototype_mean, baseline_mean, prototype_std_dev
     return cohens_d_stat
 
 
+@lru_cache(maxsize=None)
+def _solve_t_test_sample_size(alpha, power, effect_size, alternative):
+    """Solve for the required sample size, caching results since solve_power is deterministic but iterative"""
+
+    # solve for power, return ceiling of result since we want an integer value
+    return ceil(_TTEST_POWER.solve_power(effect_size=effect_size, power=power, alpha=alpha, alternative=alternative))
+
+
 def estimate_t_test_required_sample_size(alpha, power, effect_size, alternative="larger", print_result=True):
     """Estimate the required samples sizes for a given alpha, power, and effect_size (assuming an independent 2-sample, one-sided t-test)
 
@@ -67,12 +82,7 @@ def estimate_t_test_required_sample_size(alpha, power, effect_size, alternative=
         int: the estimated required sample/participant count
     """
 
-    # initialize T-test power calculator from statmodels
-    ttest_power_obj = TTestIndPower()
-
-    # solve for power, return ceiling of result since we want an integer value
-    result = ttest_power_obj.solve_power(effect_size=effect_size, power=power, alpha=alpha, alternative=alternative)
-    result = ceil(result)
+    result = _solve_t_test_sample_size(alpha, power, effect_size, alternative)
 
     # (optionally) print and return result
     if print_result:
@@ -103,16 +113,15 @@ def display_t_test_power_curve(
     """
 
     # convert effect size list and sample sizes to a np.array
-    effect_sizes = np.array(effect_sizes)
-    sample_sizes = np.array(range(min_num_samples, max_num_samples))
+    effect_sizes = np.asarray(effect_sizes, dtype=np.float64)
+    sample_sizes = np.arange(min_num_samples, max_num_samples, dtype=np.int32)
 
     # Create an axis with gridlines
     _, ax = plt.subplots()
     ax.grid(True)
 
     # generate power curves via statmodels TTestIndPower.plot_power() function
-    ttest_power_obj = TTestIndPower()
-    plt_fig = ttest_power_obj.plot_power(
+    plt_fig = _TTEST_POWER.plot_power(
         dep_var="nobs", alpha=alpha, nobs=sample_sizes, effect_size=effect_sizes, alternative=alternative, ax=ax
     )
 
@@ -171,7 +180,7 @@ def calculate_mann_whitney_statistic(prototype_samples, baseline_samples, altern
     return mannwhitneyu(x=prototype_samples, y=baseline_samples, use_continuity=True, alternative=alternative)
 
 
-def generate_bounded_normal_dist_samples(mean, std_dev, upper_bound, lower_bound, num_samples=30):
+def generate_bounded_normal_dist_samples(mean, std_dev, upper_bound, lower_bound, num_samples=30, rng=None):
     """Randomly generate a set of data values corresponding to a bounded normal distribution
 
     "Bounded" in this case refers to normally distributed data that has min or max value.  For example, if we want to
@@ -183,6 +192,8 @@ def generate_bounded_normal_dist_samples(mean, std_dev, upper_bound, lower_bound
         upper_bound (float): upper bound of sample distribution
         lower_bound (float): lower bound of sample distribution
         num_samples (int): _description_. Defaults to 30.
+        rng (int or np.random.Generator): seed or generator used for sampling, for reproducible samples. Defaults to None
+            (a freshly seeded generator).
 
     Returns:
         list: a list of values sampled from the specified distribution
@@ -192,23 +203,20 @@ def generate_bounded_normal_dist_samples(mean, std_dev, upper_bound, lower_bound
     assert (mean - 3 * std_dev) <= upper_bound, "The value of (mean - 3 * std_dev) must be less than your upper bound!"
     assert (mean + 3 * std_dev) >= lower_bound, "The value of (mean + 3 * std_dev) must be greater than your lower bound"
 
-    # sample from the normal distribution
-    samples = np.random.normal(mean, std_dev, num_samples)
-
-    # filter out values outside of bounds
-    samples = [value for value in samples if value <= upper_bound and value >= lower_bound]
-
-    # continuously sample values and filter out-of-bounds values until we have total number of samples
-    while len(samples) < num_samples:
-        # sample and filter out-of-bounds samples again
-        additional_samples = np.random.normal(mean, std_dev, num_samples)
-        additional_samples = [value for value in samples if value <= upper_bound and value >= lower_bound]
+    # preallocate output and continuously sample values, keeping in-bounds values, until we have total number of samples
+    # (twice as many values are drawn per batch so that one batch usually suffices)
+    rng = np.random.default_rng(rng)
+    samples = np.empty(num_samples)
+    num_accepted = 0
+    while num_accepted < num_samples:
+        # sample from the normal distribution and filter out values outside of bounds
+        additional_samples = rng.normal(mean, std_dev, num_samples * 2)
+        additional_samples = additional_samples[(additional_samples <= upper_bound) & (additional_samples >= lower_bound)]
 
         # add additional samples (if we now have enough samples, grab enough to hit num_samples maximum)
-        if len(additional_samples) > num_samples - len(samples):
-            samples = samples + additional_samples[0 : num_samples - len(samples)]
-        else:
-            samples = samples + additional_samples
+        num_new = min(len(additional_samples), num_samples - num_accepted)
+        samples[num_accepted : num_accepted + num_new] = additional_samples[:num_new]
+        num_accepted += num_new
 
     # return final list of bounded normal distribution samples
-    return samples
+    return samples.tolist()
@@ -20,8 +20,22 @@ IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import csv
 import os
+from itertools import chain
 from eval_utils.file_utils import load_directory
 
+# output buffer size when writing the summary CSV
+SUMMARY_CSV_BUFFER_SIZE = 1024 * 1024
+
+
+def _summary_rows(dict_summary: dict, csv_metadata: dict, column_names: list):
+    """
+    Yield each summary row as a tuple in column order. JSONL values take precedence over task metadata, columns
+    missing from both are left blank, and extra JSONL attributes (e.g. state_transitions) are dropped
+    """
+    for entry in dict_summary.values():
+        task_metadata = csv_metadata[entry["task_id"]]
+        yield tuple(entry.get(column, task_metadata.get(column, "")) for column in column_names)
+
 
 def directory_summary(dir_name: str, output_filename: str) -> None:
     """
@@ -37,14 +51,12 @@ def directory_summary(dir_name: str, output_filename: str) -> None:
         raise Exception(f"There is no task_metadata.csv spreadsheet in your input directory:  {dir_name}")
 
     # Get column names to output to CSV. Most come from JSONL files. Task metadata is added
-    # to each line according to task_id
-    random_key = next(iter(dict_summary))
-    column_names = [elem for elem in dict_summary[random_key]]
-    random_key = next(iter(csv_metadata))
-    task_metadata_column_names = [elem for elem in csv_metadata[random_key]]
-    if "state_transitions" in column_names:
-        column_names.remove("state_transitions")
-    column_names.extend(task_metadata_column_names)
+    # to each line according to task_id. Columns are the ordered, de-duplicated union of keys
+    # across all entries, so a field missing from any one entry is not dropped
+    jsonl_column_names = dict.fromkeys(chain.from_iterable(dict_summary.values()))
+    jsonl_column_names.pop("state_transitions", None)
+    task_metadata_column_names = dict.fromkeys(chain.from_iterable(csv_metadata.values()))
+    column_names = list(dict.fromkeys(chain(jsonl_column_names, task_metadata_column_names)))
 
     if os.path.exists(output_filename):
         raise ValueError("Output file path already exists")
@@ -53,18 +65,8 @@ def directory_summary(dir_name: str, output_filename: str) -> None:
         raise Exception(f"Directory path {os.path.dirname(output_filename)} does not exist!")
 
     # Write to CSV
-    with open(output_filename, "w", newline="") as csv_file:
+    with open(output_filename, "w", newline="", buffering=SUMMARY_CSV_BUFFER_SIZE) as csv_file:
         csv_writer = csv.writer(csv_file, delimiter=",")
         csv_writer.writerow(column_names)
 
-        for entry in dict_summary:
-            csv_row = []
-            for column in column_names:
-                if column in dict_summary[entry]:
-                    csv_row.append(dict_summary[entry][column])
-                elif column in task_metadata_column_names:
-                    task = dict_summary[entry]["task_id"]
-                    csv_row.append(csv_metadata[task][column])
-                else:
-                    csv_row.append("")
-            csv_writer.writerow(csv_row)
+        csv_writer.writerows(_summary_rows(dict_summary, csv_metadata, column_names))
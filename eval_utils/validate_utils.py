@@ -18,14 +18,48 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR
 IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-import hashlib
 from datetime import datetime
+from types import UnionType
+
+# ciso8601 is optional; fall back to datetime.fromisoformat if it is not installed
+try:
+    from ciso8601 import parse_datetime as _parse_iso_datetime
+except ImportError:
+    _parse_iso_datetime = datetime.fromisoformat
 
 ########################
 ## GENERAL VALIDATION ##
 ########################
 
 conditions = ["prototype", "baseline"]
+conditions_set = frozenset(conditions)  # for membership tests; error messages list the conditions in order
+
+
+# default for dict lookups that distinguishes a missing attribute from any JSON value
+_missing = object()
+
+
+def _is_one_of(value, allowed_values: frozenset) -> bool:
+    """
+    Check a value against a set of allowed strings without failing on unhashable JSON values (lists, dicts)
+    """
+    return isinstance(value, str) and value in allowed_values
+
+
+def _missing_attributes_error(schema: dict, missing_attributes: frozenset, line_no, filename) -> Exception:
+    """
+    Build the error for attributes missing from an input, listing all of them in schema order
+    """
+    attrs = ", ".join(f"'{attr}'" for attr in schema if attr in missing_attributes)
+    noun = "Attributes" if len(missing_attributes) > 1 else "Attribute"
+    return Exception(f"{noun} {attrs} not found on line {line_no} of {filename}")
+
+
+def _as_type_tuple(attr_type) -> tuple:
+    """
+    Convert a schema type to a plain tuple of types for isinstance, e.g. str | int becomes (str, int)
+    """
+    return attr_type.__args__ if isinstance(attr_type, UnionType) else (attr_type,)
 
 
 def iso_str_as_datetime(iso_str: str) -> datetime:
@@ -33,7 +67,7 @@ def iso_str_as_datetime(iso_str: str) -> datetime:
     Convert a string formatted as an ISO 8601 UTC timestamp to a python datetime object
     """
     try:
-        datetime_obj = datetime.fromisoformat(iso_str)
+        datetime_obj = _parse_iso_datetime(iso_str)
         return datetime_obj
     except ValueError as err:
         raise ValueError(f"Input {iso_str} is not an ISO 8601 UTC Timestamp. {err}")
@@ -59,6 +93,13 @@ subject_task_schema = {
     "optional_content": dict,  # this field will be passed over in validation
 }
 
+required_subject_task_attributes = frozenset(attr for attr in subject_task_schema if attr != "optional_content")
+
+# (attribute, types) pairs checked with isinstance; condition is checked against the list of conditions instead
+subject_task_type_checks = tuple(
+    (attr, _as_type_tuple(attr_type)) for attr, attr_type in subject_task_schema.items() if attr != "condition"
+)
+
 
 def verify_all_subject_task_fields_present(subject_task_input: dict, line_no: str = "?", filename: str = "?") -> None:
     """
@@ -67,9 +108,9 @@ def verify_all_subject_task_fields_present(subject_task_input: dict, line_no: st
         Output: Nothing if success, raises error if an attribute is missing
     """
 
-    for attr in subject_task_schema:
-        if attr not in subject_task_input and attr != "optional_content":
-            raise Exception(f"Attribute '{attr}' not found on line {line_no} of {filename}")
+    missing_attributes = required_subject_task_attributes.difference(subject_task_input)
+    if missing_attributes:
+        raise _missing_attributes_error(subject_task_schema, missing_attributes, line_no, filename)
 
 
 def type_check_subject_task_fields(subject_task_input: dict, line_no: str = "?", filename: str = "?") -> None:
@@ -79,17 +120,27 @@ def type_check_subject_task_fields(subject_task_input: dict, line_no: str = "?",
         Output: Nothing if success, raises error if a value is incorrect
     """
 
-    for attr in subject_task_input:
-        value = subject_task_input[attr]
-        if attr == "condition":
-            if value not in conditions:
-                raise ValueError(f"{attr} is not one of {conditions} ({filename} line {line_no})")
-        else:
-            try:
-                if not isinstance(value, subject_task_schema[attr]):
-                    raise TypeError(f"{attr} is not type {subject_task_schema[attr]} ({filename} line {line_no})")
-            except KeyError:
-                continue
+    condition = subject_task_input.get("condition", _missing)
+    if condition is not _missing and not _is_one_of(condition, conditions_set):
+        raise ValueError(f"condition is not one of {conditions} ({filename} line {line_no})")
+
+    for attr, attr_type in subject_task_type_checks:
+        value = subject_task_input.get(attr, _missing)
+        if value is not _missing and not isinstance(value, attr_type):
+            raise TypeError(f"{attr} is not type {subject_task_schema[attr]} ({filename} line {line_no})")
+
+
+def validate_subject_task_fields(subject_task_input: dict, line_no: str = "?", filename: str = "?") -> None:
+    """
+    Validate a Subject-Task dictionary: check all fields are present, convert task_start_time to a datetime,
+    and check all values are the correct type
+        Input: Subject-Task dictionary
+        Output: Nothing if success (task_start_time is converted in place), raises error if validation fails
+    """
+
+    verify_all_subject_task_fields_present(subject_task_input, line_no, filename)
+    subject_task_input["task_start_time"] = iso_str_as_datetime(subject_task_input["task_start_time"])
+    type_check_subject_task_fields(subject_task_input, line_no, filename)
 
 
 ########################################
@@ -97,6 +148,7 @@ def type_check_subject_task_fields(subject_task_input: dict, line_no: str = "?",
 ########################################
 
 state_ids = ["task_initialized", "task_execution", "km_push_activity", "km_pull_activity", "task_conclusion"]
+state_ids_set = frozenset(state_ids)  # for membership tests; error messages list the state ids in order
 
 state_transition_schema = {
     "subject_id": str | int,
@@ -107,25 +159,44 @@ state_transition_schema = {
     "optional_content": dict,  # this field will be passed over in validation
 }
 
-valid_state_transitions = [
-    ("task_initialized", "task_execution"),
-    ("task_initialized", "km_pull_activity"),
-    ("task_initialized", "km_push_activity"),
-    ("task_initialized", "task_conclusion"),
-    ("task_execution", "task_execution"),
-    ("task_execution", "km_push_activity"),
-    ("km_push_activity", "task_execution"),
-    ("km_push_activity", "km_pull_activity"),
-    ("km_push_activity", "task_conclusion"),
-    ("km_pull_activity", "km_push_activity"),
-    ("km_pull_activity", "task_execution"),
-    ("km_pull_activity", "task_conclusion"),
-    ("task_execution", "km_pull_activity"),
-    ("task_execution", "task_conclusion"),
-]
+valid_state_transitions = frozenset(
+    {
+        ("task_initialized", "task_execution"),
+        ("task_initialized", "km_pull_activity"),
+        ("task_initialized", "km_push_activity"),
+        ("task_initialized", "task_conclusion"),
+        ("task_execution", "task_execution"),
+        ("task_execution", "km_push_activity"),
+        ("km_push_activity", "task_execution"),
+        ("km_push_activity", "km_pull_activity"),
+        ("km_push_activity", "task_conclusion"),
+        ("km_pull_activity", "km_push_activity"),
+        ("km_pull_activity", "task_execution"),
+        ("km_pull_activity", "task_conclusion"),
+        ("task_execution", "km_pull_activity"),
+        ("task_execution", "task_conclusion"),
+    }
+)
+
+# Allowed next state ids for each state id, so a transition is checked without building a (from, to) tuple
+valid_next_state_ids = {
+    state_id: frozenset(
+        next_state_id for from_state_id, next_state_id in valid_state_transitions if from_state_id == state_id
+    )
+    for state_id in state_ids
+}
 
 initial_state_id = "task_initialized"
 
+required_state_transition_attributes = frozenset(attr for attr in state_transition_schema if attr != "optional_content")
+
+# (attribute, types) pairs checked with isinstance; condition and state_id are checked against their lists instead
+state_transition_type_checks = tuple(
+    (attr, _as_type_tuple(attr_type))
+    for attr, attr_type in state_transition_schema.items()
+    if attr not in ("condition", "state_id")
+)
+
 
 def verify_all_state_transition_fields_present(
     state_transition_input: dict, line_no: int = "?", filename: str = "?"
@@ -135,9 +206,9 @@ def verify_all_state_transition_fields_present(
         Input: State Transition dictionary, line number in original file
         Output: Nothing if success, error raised if an attribute is missing
     """
-    for attr in state_transition_schema:
-        if attr not in state_transition_input and attr != "optional_content":
-            raise Exception(f"Attribute '{attr}' not found on line {line_no} of {filename}")
+    missing_attributes = required_state_transition_attributes.difference(state_transition_input)
+    if missing_attributes:
+        raise _missing_attributes_error(state_transition_schema, missing_attributes, line_no, filename)
 
 
 def type_check_state_transition_fields(state_transition_input: dict, line_no: int = "?", filename: str = "?") -> None:
@@ -146,20 +217,29 @@ def type_check_state_transition_fields(state_transition_input: dict, line_no: in
         Input: State Transition dictionary, line number in original file
         Output: Nothing if success, error raised if a value is incorrect
     """
-    for attr in state_transition_input:
-        value = state_transition_input[attr]
-        if attr == "state_id":
-            if value not in state_ids:
-                raise ValueError(f"{attr} on line {line_no} of {filename} is not one of {state_ids}")
-        elif attr == "condition":
-            if value not in conditions:
-                raise ValueError(f"{attr} is not one of {conditions}")
-        else:
-            try:
-                if not isinstance(value, state_transition_schema[attr]):
-                    raise TypeError(f"{attr} on line {line_no} of {filename} is not type {state_transition_schema[attr]}")
-            except KeyError:
-                continue
+    condition = state_transition_input.get("condition", _missing)
+    if condition is not _missing and not _is_one_of(condition, conditions_set):
+        raise ValueError(f"condition is not one of {conditions}")
+    state_id = state_transition_input.get("state_id", _missing)
+    if state_id is not _missing and not _is_one_of(state_id, state_ids_set):
+        raise ValueError(f"state_id on line {line_no} of {filename} is not one of {state_ids}")
+
+    for attr, attr_type in state_transition_type_checks:
+        value = state_transition_input.get(attr, _missing)
+        if value is not _missing and not isinstance(value, attr_type):
+            raise TypeError(f"{attr} on line {line_no} of {filename} is not type {state_transition_schema[attr]}")
+
+
+def validate_state_transition_fields(state_transition_input: dict, line_no: int = "?", filename: str = "?") -> None:
+    """
+    Validate a State Transition dictionary: check all fields are present, convert utc_timestamp to a datetime,
+    and check all values are the correct type
+        Input: State Transition dictionary, line number in original file
+        Output: Nothing if success (utc_timestamp is converted in place), error raised if validation fails
+    """
+    verify_all_state_transition_fields_present(state_transition_input, line_no, filename)
+    state_transition_input["utc_timestamp"] = iso_str_as_datetime(state_transition_input["utc_timestamp"])
+    type_check_state_transition_fields(state_transition_input, line_no, filename)
 
 
 def verify_timestamps_inorder(
@@ -189,7 +269,7 @@ def verify_state_transition_valid(
         Inputs: two state ids and their line numbers
         Output: Nothing if the edge exists in valid_state_transitions, error raised if not
     """
-    if (state_id_1, state_id_2) not in valid_state_transitions:
+    if state_id_2 not in valid_next_state_ids.get(state_id_1, ()):
         raise ValueError(
             f"State transition between lines {state_id_1_line_no} and {state_id_2_line_no} of {filename} is not valid"
         )
@@ -228,21 +308,21 @@ def verify_last_state_is_task_conclusion(
 ####################
 
 
+required_column_names = ["task_id", "task_optimal_time_in_seconds", "task_maximum_score"]
+optional_column_names = ["task_passing_score"]
+allowed_column_names = frozenset(required_column_names + optional_column_names)
+
+
 def verify_column_names(column_names: list) -> None:
     """
     Validate that column names are correct and in correct order
         Inputs: list of column names
         Outputs: Nothing if column names are correct, error raised if not
     """
-    required_column_names = ["task_id", "task_optimal_time_in_seconds", "task_maximum_score"]
-    optional_column_names = ["task_passing_score"]
-
-    missing_columns = list(set(required_column_names).difference(column_names))
-    extra_columns = list(set(column_names).difference(required_column_names))
+    present_column_names = frozenset(column_names)
 
-    for column in extra_columns:
-        if column in optional_column_names:
-            extra_columns.remove(column)
+    missing_columns = [column for column in required_column_names if column not in present_column_names]
+    extra_columns = [column for column in column_names if column not in allowed_column_names]
 
     if missing_columns:
         raise ValueError(
@@ -19,8 +19,17 @@ IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 import argparse
-from eval_utils.file_utils import *
-from eval_utils.metrics_utils import *
+import csv
+import os
+from eval_utils.file_utils import load_directory
+from eval_utils.metrics_utils import (
+    group_by_task,
+    get_km_time_proportional_reduction,
+    get_prototype_time_relative_to_baseline_and_optimal,
+    get_proportional_task_failure_rate_reduction,
+    get_binarized_proportional_task_failure_rate_reduction,
+    get_proportional_increase_in_productivity,
+)
 
 """
 Python script to calculate evaluation metrics for a directory
@@ -29,6 +38,68 @@ Python script to calculate evaluation metrics for a directory
     Example usage: `python evaluate.py -i tests/test_input_files -o output_files/metrics.csv`
 """
 
+# output buffer size when writing the metrics CSV
+METRICS_CSV_BUFFER_SIZE = 1024 * 1024
+
+
+def core_metric_row(task_jsonl: dict, task: str, task_metadata: dict) -> list:
+    """
+    Calculate the core evaluation metrics for a task
+        Inputs: loaded JSONL entries for the task, task ID, task metadata for the task
+        Outputs: CSV row of task ID and core metrics
+    """
+    km_time_proportional_reduction = get_km_time_proportional_reduction(task_jsonl, task)
+    relative_time = get_prototype_time_relative_to_baseline_and_optimal(
+        task_jsonl, task, task_metadata["task_optimal_time_in_seconds"]
+    )
+    proportional_task_failure_rate_reduction = get_proportional_task_failure_rate_reduction(
+        task_jsonl, task, task_metadata["task_maximum_score"]
+    )
+    proportional_productivity_increase = get_proportional_increase_in_productivity(task_jsonl, task)
+    return [
+        task,
+        km_time_proportional_reduction,
+        relative_time,
+        proportional_task_failure_rate_reduction,
+        proportional_productivity_increase,
+    ]
+
+
+def task_metric_rows(jsonl_contents: dict, csv_contents: dict, calculate_binarized_proportional_task_failure_rate: bool):
+    """
+    Calculate the evaluation metrics for each task in the task metadata
+        Inputs: loaded JSONL entries, loaded task metadata, whether to add the binarized failure rate column
+        Outputs: generator of CSV rows, one per task
+    """
+
+    # Group entries by task once rather than scanning every entry for each task
+    jsonl_by_task = group_by_task(jsonl_contents)
+
+    # Whether the optional column is written is the same for every task, so pick the loop once
+    if not calculate_binarized_proportional_task_failure_rate:
+        for task, task_metadata in csv_contents.items():
+            yield core_metric_row(jsonl_by_task.get(str(task), {}), task, task_metadata)
+        return
+
+    for task, task_metadata in csv_contents.items():
+        task_jsonl = jsonl_by_task.get(str(task), {})
+        row = core_metric_row(task_jsonl, task, task_metadata)
+
+        # Optional metrics
+        if task_metadata.get("task_passing_score"):
+            binarized_proportional_task_failure_rate_reduction = get_binarized_proportional_task_failure_rate_reduction(
+                task_jsonl,
+                task,
+                task_metadata["task_maximum_score"],
+                task_metadata["task_passing_score"],
+            )
+            row.append(binarized_proportional_task_failure_rate_reduction)
+        else:
+            row.append("")
+
+        yield row
+
+
 # Parse command line arguments
 parser = argparse.ArgumentParser(description="Python script to calculate evaluation metrics for a task")
 parser.add_argument(
@@ -51,7 +122,7 @@ try:
     if os.path.exists(args.output):
         raise ValueError("Output file path already exists")
 
-    with open(args.output, "w", newline="") as csv_file:
+    with open(args.output, "w", newline="", buffering=METRICS_CSV_BUFFER_SIZE) as csv_file:
         csv_writer = csv.writer(csv_file, delimiter=",")
 
         # Add core metrics column names
@@ -74,41 +145,10 @@ try:
         # Write headers to file
         csv_writer.writerow(headers)
 
-        for task in csv_contents:
-            # Core metrics
-            km_time_proportional_reduction = get_km_time_proportional_reduction(jsonl_contents, task)
-            relative_time = get_prototype_time_relative_to_baseline_and_optimal(
-                jsonl_contents, task, csv_contents[task]["task_optimal_time_in_seconds"]
-            )
-            proportional_task_failure_rate_reduction = get_proportional_task_failure_rate_reduction(
-                jsonl_contents, task, csv_contents[task]["task_maximum_score"]
-            )
-            proportional_productivity_increase = get_proportional_increase_in_productivity(jsonl_contents, task)
-            row = [
-                task,
-                km_time_proportional_reduction,
-                relative_time,
-                proportional_task_failure_rate_reduction,
-                proportional_productivity_increase,
-            ]
-
-            # Optional metrics
-            if calculate_binarized_proportional_task_failure_rate:
-                if "task_passing_score" in csv_contents[task] and csv_contents[task]["task_passing_score"]:
-                    binarized_proportional_task_failure_rate_reduction = (
-                        get_binarized_proportional_task_failure_rate_reduction(
-                            jsonl_contents,
-                            task,
-                            csv_contents[task]["task_maximum_score"],
-                            csv_contents[task]["task_passing_score"],
-                        )
-                    )
-                    row.append(binarized_proportional_task_failure_rate_reduction)
-                else:
-                    row.append("")
-
-            # Write metrics to file
-            csv_writer.writerow(row)
+        # Write metrics to file
+        csv_writer.writerows(
+            task_metric_rows(jsonl_contents, csv_contents, calculate_binarized_proportional_task_failure_rate)
+        )
 
 except Exception as err:
     print(f"ERROR: {err}")
@@ -19,54 +19,107 @@ IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 import argparse, os
-from eval_utils.file_utils import *
-from eval_utils.validate_utils import *
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from eval_utils.file_utils import json_loads, load_csv_file, load_jsonl_file
+from eval_utils.validate_utils import validate_subject_task_fields
 
 """
 Python script to verify that an input file has been constructed correctly
-    Inputs: -i <input file path>
-    Outputs: Error or Success print statement
+    Inputs: -i <input file or directory path>, (optional) -j <number of worker processes>
+    Outputs: Error or Success print statement for each file
     Example usage: `python validate.py -i docs/sample_subject_task.jsonl`
 """
 
-# Parse command line arguments
-parser = argparse.ArgumentParser(description="Python script to verify that an input file has been constructed correctly")
-parser.add_argument(
-    "-i",
-    "--input",
-    help="Path to file to verify",
-    required=True,
-)
-args = parser.parse_args()
-
-file_ext = os.path.splitext(args.input)[-1]
-
-try:
-    # Validate Subject-Task or State Transitions JSONL
-    if file_ext == ".jsonl":
-        # Identify file type, validate, and load
-        jsonl_input = load_jsonl_file(args.input)
-        print(f"Success: {args.input} is a valid JSONL")
-
-    elif file_ext == ".json":
-        # read the JSON file that process the subject-task JSON
-        with open(args.input, "r") as json_file:
-            json_obj = json.load(json_file)
-
-        # Run validation checks
-        verify_all_subject_task_fields_present(json_obj, 1, args.input)
-        json_obj["task_start_time"] = iso_str_as_datetime(json_obj["task_start_time"])  # set task_start_time as a datetime
-        type_check_subject_task_fields(json_obj, 1, args.input)
-
-        print(f"Success: {args.input} is a valid subject-task JSON")
-
-    # Validate Task Metadata CSV
-    elif file_ext == ".csv":
-        csv_input = load_csv_file(args.input)
-        print(f"Success: {args.input} is a valid CSV")
 
-    else:
-        raise TypeError("Unknown file type.  File must be one of following:  .json, .jsonl, or .csv")
+def validate_jsonl(input_path: str) -> str:
+    """
+    Validate a Subject-Task or State Transitions JSONL
+    """
+    # Identify file type, validate, and load
+    load_jsonl_file(input_path)
+    return f"Success: {input_path} is a valid JSONL"
+
+
+def validate_json(input_path: str) -> str:
+    """
+    Validate a Subject-Task JSON
+    """
+    # read the JSON file that process the subject-task JSON
+    with open(input_path, "rb") as json_file:
+        json_obj = json_loads(json_file.read())
+
+    # Run validation checks
+    validate_subject_task_fields(json_obj, 1, input_path)  # also sets task_start_time as a datetime
+    return f"Success: {input_path} is a valid subject-task JSON"
+
+
+def validate_csv(input_path: str) -> str:
+    """
+    Validate a Task Metadata CSV
+    """
+    load_csv_file(input_path)
+    return f"Success: {input_path} is a valid CSV"
+
+
+def validate_unknown(input_path: str) -> str:
+    """
+    Reject a file with an unsupported extension
+    """
+    raise TypeError("Unknown file type.  File must be one of following:  .json, .jsonl, or .csv")
 
-except Exception as err:
-    print(f"ERROR: {err}")
+
+# Validation function for each supported file extension
+file_validators = {".jsonl": validate_jsonl, ".json": validate_json, ".csv": validate_csv}
+
+
+def validate_file(input_path: str, include_path: bool = False) -> str:
+    """
+    Validate a single file according to its extension
+        Inputs: input_path (str), include_path (bool) whether error messages name the file
+        Outputs: Error or Success message for the file
+    """
+    validator = file_validators.get(os.path.splitext(input_path)[-1], validate_unknown)
+    try:
+        return validator(input_path)
+    except Exception as err:
+        if include_path:
+            return f"ERROR: {input_path}: {err}"
+        return f"ERROR: {err}"
+
+
+if __name__ == "__main__":
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="Python script to verify that an input file has been constructed correctly")
+    parser.add_argument(
+        "-i",
+        "--input",
+        help="Path to file to verify, or to a directory of .json, .jsonl, and .csv files to verify",
+        required=True,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of worker processes used to verify a directory (defaults to the number of CPUs)",
+        type=int,
+        default=None,
+    )
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("argument -j/--jobs: must be a positive integer")
+
+    if os.path.isdir(args.input):
+        # Files are independent of each other, so validate them in parallel and print results in name order
+        with os.scandir(args.input) as dir_entries:
+            input_paths = sorted(
+                dir_entry.path
+                for dir_entry in dir_entries
+                if dir_entry.is_file() and os.path.splitext(dir_entry.name)[-1] in file_validators
+            )
+        # Files are handed to workers in chunks, since raw data directories often hold many small files;
+        # error messages name their file so that failures can be traced back within the directory
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            for message in executor.map(partial(validate_file, include_path=True), input_paths, chunksize=16):
+                print(message)
+    else:
+        print(validate_file(args.input))